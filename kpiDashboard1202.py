@@ -1,10 +1,13 @@
 # Import required libraries
 import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import glob
+import hashlib
 import os
 
 # Set page configuration
@@ -22,67 +25,215 @@ st.markdown("Analysis of PJM's Regional Hourly Energy Consumption Data")
 COLOR_SCHEME = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
 MAIN_COLOR = '#1f77b4'  # Primary color for single-color charts
 
-# Function to load and preprocess data
-@st.cache_data
+# Function to add derived time-based columns
+def add_time_columns(df):
+    """
+    Add the time-based columns used by the filters and charts
+    """
+    # Small-cardinality calendar columns fit in unsigned integer types;
+    # dates are derived from Datetime where needed rather than stored
+    df['Hour'] = df.index.hour.astype('uint8')
+    df['Month'] = df.index.month.astype('uint8')
+    df['Year'] = df.index.year.astype('uint16')
+    df['Day_of_week'] = df.index.dayofweek.astype('uint8')
+
+    return df
+
+# Bump when the layout of the cached Parquet frame changes
+DATA_CACHE_VERSION = 3
+
+# Function to load and preprocess data. cache_resource hands every
+# session the same frame instead of pickling a copy per access, which
+# is safe here because nothing mutates the frame after loading.
+@st.cache_resource
 def load_data():
     """
     Load and preprocess all energy consumption data files
     """
     # Get all CSV files in the data directory (excluding parquet files)
     data_files = glob.glob('data/*_hourly.csv')
-    
+
+    # Check for a pre-merged Parquet cache of the CSVs so repeated cold
+    # starts skip the per-file CSV parsing and merging entirely. The cache
+    # key covers the file list and modification times, so editing or adding
+    # a data file invalidates it automatically.
+    cache_key = hashlib.md5(
+        str((DATA_CACHE_VERSION,
+             sorted((f, os.path.getmtime(f)) for f in data_files))).encode()
+    ).hexdigest()
+    cache_path = f'data/_cache_{cache_key}.parquet'
+    if os.path.exists(cache_path):
+        # memory_map lets the OS page the file in lazily and share the
+        # mapped bytes rather than buffering the whole file per read
+        df = pd.read_parquet(cache_path, engine='pyarrow', memory_map=True)
+        return add_time_columns(df)
+
     # Create empty list to store dataframes
     dfs = []
     
     # Load each file and append to list
     for file in data_files:
         try:
-            # Read CSV and handle different column structures
-            temp_df = pd.read_csv(file)
-            
-            # Check if we need to fix column names
-            if len(temp_df.columns) == 2:  # If file has exactly 2 columns
-                temp_df.columns = ['Datetime', 'MW']  # Set standard column names
-            elif any(col.endswith('_MW') for col in temp_df.columns):  # Handle pre-named columns
-                mw_col = next(col for col in temp_df.columns if col.endswith('_MW'))
-                temp_df = temp_df.rename(columns={mw_col: 'MW'})
-                
+            # Open the file as an Arrow dataset so the scan runs
+            # multithreaded and only the two needed columns are read;
+            # Arrow parses the ISO timestamps during the same pass
+            file_ds = ds.dataset(file, format='csv')
+            names = file_ds.schema.names
+
+            # Find the datetime and MW columns across file layouts
+            dt_col = 'Datetime' if 'Datetime' in names else names[0]
+            mw_col = next((c for c in names if c.endswith('_MW')), names[1])
+
+            table = file_ds.to_table(columns=[dt_col, mw_col])
+
             # Get the region name from the filename
             region = os.path.basename(file).split('_')[0].upper()  # Added .upper() for consistency
-            
-            # Rename the MW column to include region
-            mw_col = 'MW' if 'MW' in temp_df.columns else temp_df.columns[1]
-            temp_df = temp_df[['Datetime', mw_col]].copy()
-            temp_df.columns = ['Datetime', f'{region}_MW']
-            
+
+            # Hand the Arrow buffers to pandas without an extra copy,
+            # index by Datetime so all regions can be aligned with a
+            # single concat below, and keep the MW column as float32
+            temp_df = table.to_pandas(split_blocks=True, self_destruct=True)
+            temp_df = temp_df.set_index(dt_col)[[mw_col]].astype('float32')
+            temp_df.index.name = 'Datetime'
+            temp_df.columns = [f'{region}_MW']
+
+            # Drop repeated DST hours so the index is unique for alignment
+            temp_df = temp_df[~temp_df.index.duplicated(keep='first')]
+
             dfs.append(temp_df)
             
         except Exception as e:
             st.sidebar.warning(f"Could not load {file}: {str(e)}")
     
-    # Merge all dataframes on Datetime
+    # The PJM files all sit on the same hourly grid, so instead of an
+    # outer-join alignment, build one hourly index spanning every file
+    # and scatter each region's values into a preallocated float32
+    # matrix at their searchsorted positions. The sorted DatetimeIndex
+    # is kept so date ranges slice in O(log N).
     if dfs:
-        df = dfs[0]
-        for other_df in dfs[1:]:
-            df = pd.merge(df, other_df, on='Datetime', how='outer')
+        grid = pd.date_range(
+            min(temp_df.index.min() for temp_df in dfs),
+            max(temp_df.index.max() for temp_df in dfs),
+            freq='h'
+        )
+        mat = np.full((len(grid), len(dfs)), np.nan, dtype='float32')
+        for k, temp_df in enumerate(dfs):
+            # Guard against rows that are not exactly on the hour:
+            # searchsorted returns len(grid) for timestamps past the
+            # last grid hour, so clip before comparing and let the
+            # equality check reject the clipped rows too
+            pos = grid.searchsorted(temp_df.index).clip(max=len(grid) - 1)
+            on_grid = grid[pos] == temp_df.index
+            mat[pos[on_grid], k] = temp_df.iloc[:, 0].to_numpy()[on_grid]
+        df = pd.DataFrame(mat, index=grid,
+                          columns=[temp_df.columns[0] for temp_df in dfs])
+        df.index.name = 'Datetime'
     else:
         st.error("No data files could be loaded!")
         st.stop()
-    
-    # Process datetime and add time-based columns
-    df['Datetime'] = pd.to_datetime(df['Datetime'])
-    df['Hour'] = df['Datetime'].dt.hour
-    df['Date'] = df['Datetime'].dt.date
-    df['Month'] = df['Datetime'].dt.month
-    df['Year'] = df['Datetime'].dt.year
-    df['Day_of_week'] = df['Datetime'].dt.dayofweek
-    
-    return df
+
+    # Save the merged frame to the Parquet cache for future cold starts
+    df.to_parquet(cache_path, compression='zstd')
+
+    return add_time_columns(df)
+
+# Function to build the narrow per-region frame the KPI and chart code
+# works on, cached by region name
+@st.cache_data
+def get_region_frame(_df, column):
+    """
+    Return one region's MW column plus the calendar columns
+
+    Keyed by the column name alone, so switching back to a previously
+    viewed region reuses the cached narrow frame instead of re-slicing
+    the wide one.
+    """
+    return _df[[column, 'Hour', 'Month', 'Year', 'Day_of_week']]
+
+# Function to average values into a fixed number of buckets
+def binned_mean(codes, values, n_bins):
+    """
+    Mean of values per bucket code via bincount, skipping NaNs
+
+    For small fixed cardinalities like hour of day or day of week this
+    replaces the hash table and group indexer that the full groupby
+    machinery builds. Buckets with no rows come back as NaN.
+    """
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_bins)
+    counts = np.bincount(codes[valid], minlength=n_bins)
+    with np.errstate(invalid='ignore'):
+        return sums / counts
+
+# Function to compute the chart aggregates for one region and date range
+@st.cache_data
+def compute_aggregates(_df, column, start_date, end_date):
+    """
+    Group the filtered slice once per (region, date range) combination
+
+    The leading underscore keeps st.cache_data from hashing the frame;
+    it is already immutable within a session, so the cache is keyed by
+    the column name and date bounds alone.
+    """
+    filtered = _df.loc[str(start_date):str(end_date)]
+
+    # The hour and day-of-week patterns have fixed small cardinalities,
+    # so they use the bincount kernel on the raw buffers; the remaining
+    # groupbys pass sort=False/observed=True and sort the small result
+    # index once at the end
+    mw = filtered[column].to_numpy()
+
+    return {
+        'daily': filtered.groupby(filtered.index.normalize(), observed=True, sort=False)[column]
+                         .mean().sort_index().rename_axis('Date').reset_index(),
+        'hourly': pd.DataFrame({
+            'Hour': np.arange(24, dtype='uint8'),
+            column: binned_mean(filtered['Hour'].to_numpy(), mw, 24),
+        }),
+        'dow': pd.DataFrame({
+            'Day_of_week': np.arange(7, dtype='uint8'),
+            column: binned_mean(filtered['Day_of_week'].to_numpy(), mw, 7),
+        }),
+        'yearly': filtered.groupby('Year', observed=True, sort=False)[column]
+                          .mean().sort_index().reset_index(),
+        'monthly_stats': filtered.groupby('Month', observed=True, sort=False)[column]
+                                 .describe(percentiles=[.25, .5, .75]).sort_index(),
+    }
+
+# Function to compute the KPI scalars for one region and date range
+@st.cache_data
+def compute_kpis(_df, column, start_date, end_date):
+    """
+    Return the average and peak consumption for the filtered slice
+
+    Cached on (region, date range) like compute_aggregates, so reruns
+    that change unrelated widgets skip the column scans entirely.
+    """
+    # Reduce over the raw float32 buffer; the NumPy nan-aware ops skip
+    # the per-call overhead and copies of the pandas Series reductions
+    arr = _df.loc[str(start_date):str(end_date), column].to_numpy()
+
+    # An empty slice (start date after end date) must render as NaN
+    # metrics like the pandas reductions did; np.nanmax raises on it
+    if arr.size == 0:
+        return float('nan'), float('nan')
+
+    return float(np.nanmean(arr)), float(np.nanmax(arr))
+
+# Function to compute frame metadata used by the sidebar widgets
+@st.cache_data
+def frame_meta(_df):
+    """
+    Return the region columns and overall datetime bounds of the frame
+
+    Cached so reruns skip the column scan and min/max passes; the frame
+    is immutable within a session, so it is excluded from the cache key.
+    """
+    region_columns = [col for col in _df.columns if col.endswith('_MW')]
+    return region_columns, _df.index.min(), _df.index.max()
 
 # Function to select region
-def get_selected_region(df):
-    # Get all columns that end with '_MW'
-    region_columns = [col for col in df.columns if col.endswith('_MW')]
+def get_selected_region(region_columns):
     # Remove '_MW' from names for display
     regions = [col.replace('_MW', '') for col in region_columns]
     
@@ -97,140 +248,176 @@ def get_selected_region(df):
 # Load the data
 try:
     df = load_data()
-    selected_column = get_selected_region(df)
 except FileNotFoundError:
     st.error("Error: No PJM data files found in the 'data' folder.")
     st.stop()
 
-# Sidebar for date range selection
-st.sidebar.header("Date Range Selection")
-min_date = df['Date'].min()
-max_date = df['Date'].max()
+# The dashboard body runs as a fragment, so interacting with the
+# region or date widgets reruns only this block instead of the whole
+# script; the page chrome and data load above are persisted
+@st.fragment
+def render_dashboard(df):
+    region_columns, min_ts, max_ts = frame_meta(df)
+    selected_column = get_selected_region(region_columns)
 
-start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date)
-end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date)
+    # Sidebar for date range selection
+    st.sidebar.header("Date Range Selection")
+    min_date = min_ts.date()
+    max_date = max_ts.date()
 
-# Filter data based on date range
-mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
-filtered_df = df.loc[mask]
+    start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date)
+    end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date)
 
-# Create three columns for KPI metrics
-col1, col2, col3 = st.columns(3)
+    # Work on the narrow per-region frame from here on
+    region_df = get_region_frame(df, selected_column)
 
-# KPI 1: Average Daily Consumption
-with col1:
-    avg_consumption = filtered_df[selected_column].mean()
-    st.metric(
-        label="Average Consumption (MW)",
-        value=f"{avg_consumption:,.2f}"
-    )
+    # Filter data based on date range; partial-date slicing on the sorted
+    # DatetimeIndex bisects to the bounds instead of scanning a boolean mask,
+    # and the end date stays inclusive
+    filtered_df = region_df.loc[str(start_date):str(end_date)]
 
-# KPI 2: Peak Consumption
-with col2:
-    peak_consumption = filtered_df[selected_column].max()
-    st.metric(
-        label="Peak Consumption (MW)",
-        value=f"{peak_consumption:,.2f}"
-    )
+    # Compute the cached chart aggregates for the current selection
+    aggregates = compute_aggregates(region_df, selected_column, start_date, end_date)
 
-# KPI 3: Load Factor (Average/Peak ratio)
-with col3:
-    load_factor = (avg_consumption / peak_consumption) * 100
-    st.metric(
-        label="Load Factor (%)",
-        value=f"{load_factor:.1f}%"
+    # Create three columns for KPI metrics
+    col1, col2, col3 = st.columns(3)
+
+    # Compute the cached KPI scalars for the current selection
+    avg_consumption, peak_consumption = compute_kpis(
+        region_df, selected_column, start_date, end_date
     )
 
-# Create two columns for charts
-chart_col1, chart_col2 = st.columns(2)
+    # KPI 1: Average Daily Consumption
+    with col1:
+        st.metric(
+            label="Average Consumption (MW)",
+            value=f"{avg_consumption:,.2f}"
+        )
 
-# Chart 1: Daily Consumption Trend
-with chart_col1:
-    st.subheader("Daily Consumption Trend")
-    daily_consumption = filtered_df.groupby('Date')[selected_column].mean().reset_index()
-    fig_daily = px.line(
-        daily_consumption,
-        x='Date',
-        y=selected_column,
-        title='Average Daily Energy Consumption',
-        color_discrete_sequence=[MAIN_COLOR]
-    )
-    fig_daily.update_layout(
-        yaxis_title="Megawatts (MW)",
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        yaxis=dict(gridcolor='lightgray')
-    )
-    st.plotly_chart(fig_daily, use_container_width=True)
-
-# Chart 2: Hourly Consumption Pattern
-with chart_col2:
-    st.subheader("Average Hourly Consumption Pattern")
-    hourly_avg = filtered_df.groupby('Hour')[selected_column].mean().reset_index()
-    fig_hourly = px.line(
-        hourly_avg,
-        x='Hour',
-        y=selected_column,
-        title='Average Hourly Consumption Pattern',
-        markers=True,
-        color_discrete_sequence=[MAIN_COLOR]
+    # KPI 2: Peak Consumption
+    with col2:
+        st.metric(
+            label="Peak Consumption (MW)",
+            value=f"{peak_consumption:,.2f}"
+        )
+
+    # KPI 3: Load Factor (Average/Peak ratio)
+    with col3:
+        load_factor = (avg_consumption / peak_consumption) * 100
+        st.metric(
+            label="Load Factor (%)",
+            value=f"{load_factor:.1f}%"
+        )
+
+    # Create two columns for charts
+    chart_col1, chart_col2 = st.columns(2)
+
+    # Chart 1: Daily Consumption Trend
+    with chart_col1:
+        st.subheader("Daily Consumption Trend")
+        daily_consumption = aggregates['daily']
+        # Scattergl renders through WebGL, which stays responsive on
+        # multi-year daily series where the default SVG trace bogs down
+        fig_daily = go.Figure(
+            go.Scattergl(
+                x=daily_consumption['Date'],
+                y=daily_consumption[selected_column],
+                mode='lines',
+                line=dict(color=MAIN_COLOR)
+            )
+        )
+        fig_daily.update_layout(
+            title='Average Daily Energy Consumption',
+            yaxis_title="Megawatts (MW)",
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            yaxis=dict(gridcolor='lightgray')
+        )
+        st.plotly_chart(fig_daily, use_container_width=True)
+
+    # Chart 2: Hourly Consumption Pattern
+    with chart_col2:
+        st.subheader("Average Hourly Consumption Pattern")
+        hourly_avg = aggregates['hourly']
+        # Same WebGL trace as the daily chart so the markers render in a
+        # single GL draw call instead of one SVG node per point
+        fig_hourly = go.Figure(
+            go.Scattergl(
+                x=hourly_avg['Hour'],
+                y=hourly_avg[selected_column],
+                mode='lines+markers',
+                line=dict(color=MAIN_COLOR)
+            )
+        )
+        fig_hourly.update_layout(
+            title='Average Hourly Consumption Pattern',
+            yaxis_title="Megawatts (MW)",
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            yaxis=dict(gridcolor='lightgray')
+        )
+        st.plotly_chart(fig_hourly, use_container_width=True)
+
+    # Additional Analysis Section
+    st.header("Additional Analysis")
+
+    # Chart 3: Monthly Box Plot, built from per-month quartiles computed
+    # server-side so the browser receives 12 sets of box stats instead of
+    # every raw hourly point in the filtered range
+    monthly_stats = aggregates['monthly_stats']
+    monthly_box = go.Figure(
+        go.Box(
+            x=monthly_stats.index,
+            q1=monthly_stats['25%'],
+            median=monthly_stats['50%'],
+            q3=monthly_stats['75%'],
+            lowerfence=monthly_stats['min'],
+            upperfence=monthly_stats['max'],
+            name=selected_column,
+            marker_color=MAIN_COLOR
+        )
     )
-    fig_hourly.update_layout(
-        yaxis_title="Megawatts (MW)",
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        yaxis=dict(gridcolor='lightgray')
+    monthly_box.update_layout(
+        title='Monthly Consumption Distribution',
+        xaxis_title="Month",
+        yaxis_title="Megawatts (MW)"
     )
-    st.plotly_chart(fig_hourly, use_container_width=True)
+    st.plotly_chart(monthly_box, use_container_width=True)
 
-# Additional Analysis Section
-st.header("Additional Analysis")
+    # Chart 4: Day of Week Analysis
+    dow_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    dow_avg = aggregates['dow']
+    dow_avg['Day'] = pd.Categorical.from_codes(
+        dow_avg['Day_of_week'].to_numpy(), categories=dow_names, ordered=True
+    )
 
-# Chart 3: Monthly Box Plot
-monthly_box = px.box(
-    filtered_df,
-    x='Month',
-    y=selected_column,
-    title='Monthly Consumption Distribution'
-)
-monthly_box.update_layout(
-    xaxis_title="Month",
-    yaxis_title="Megawatts (MW)"
-)
-st.plotly_chart(monthly_box, use_container_width=True)
-
-# Chart 4: Day of Week Analysis
-dow_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-dow_avg = filtered_df.groupby('Day_of_week')[selected_column].mean().reset_index()
-dow_avg['Day'] = dow_avg['Day_of_week'].apply(lambda x: dow_names[x])
-
-dow_chart = px.bar(
-    dow_avg,
-    x='Day',
-    y=selected_column,
-    title='Average Consumption by Day of Week'
-)
-dow_chart.update_layout(yaxis_title="Megawatts (MW)")
-st.plotly_chart(dow_chart, use_container_width=True)
-
-# Add year-over-year comparison if data spans multiple years
-years = filtered_df['Year'].unique()
-if len(years) > 1:
-    st.subheader("Year-over-Year Comparison")
-    yearly_avg = filtered_df.groupby('Year')[selected_column].mean().reset_index()
-    yoy_chart = px.bar(
-        yearly_avg,
-        x='Year',
+    dow_chart = px.bar(
+        dow_avg,
+        x='Day',
         y=selected_column,
-        title='Average Annual Consumption'
+        title='Average Consumption by Day of Week'
     )
-    yoy_chart.update_layout(yaxis_title="Megawatts (MW)")
-    st.plotly_chart(yoy_chart, use_container_width=True)
+    dow_chart.update_layout(yaxis_title="Megawatts (MW)")
+    st.plotly_chart(dow_chart, use_container_width=True)
 
-# Footer with data insights
-st.markdown("---")
-st.markdown("### Key Insights")
-st.markdown(f"""
+    # Add year-over-year comparison if data spans multiple years
+    years = filtered_df['Year'].unique()
+    if len(years) > 1:
+        st.subheader("Year-over-Year Comparison")
+        yearly_avg = aggregates['yearly']
+        yoy_chart = px.bar(
+            yearly_avg,
+            x='Year',
+            y=selected_column,
+            title='Average Annual Consumption'
+        )
+        yoy_chart.update_layout(yaxis_title="Megawatts (MW)")
+        st.plotly_chart(yoy_chart, use_container_width=True)
+
+    # Footer with data insights
+    st.markdown("---")
+    st.markdown("### Key Insights")
+    st.markdown(f"""
 - This dashboard analyzes energy consumption data for the selected PJM region
 - Date range: {start_date} to {end_date}
 - Key metrics include average consumption ({avg_consumption:,.2f} MW), peak demand ({peak_consumption:,.2f} MW), and load factor ({load_factor:.1f}%)
@@ -240,6 +427,8 @@ st.markdown(f"""
 - Day of week analysis shows weekday vs weekend patterns
 """)
 
+render_dashboard(df)
+
 # Add data source information
 st.markdown("---")
 st.markdown("### Data Source")
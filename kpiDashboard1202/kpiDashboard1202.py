@@ -5,8 +5,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import glob
+import logging
 import os
 
+# Module logger for load-time diagnostics
+logger = logging.getLogger(__name__)
+
 # Set page configuration
 st.set_page_config(
     page_title="Energy Consumption KPI Dashboard",
@@ -30,10 +34,10 @@ def load_data():
     """
     # Get all CSV files in the data directory (excluding parquet files)
     data_files = glob.glob('data/*_hourly.csv')  # Changed pattern to match all _hourly.csv files
-    
+
     # Debug information
-    st.sidebar.write(f"Found {len(data_files)} data files")
-    
+    logger.debug("Found %d data files", len(data_files))
+
     # Create empty list to store dataframes
     dfs = []
     
@@ -44,8 +48,8 @@ def load_data():
             temp_df = pd.read_csv(file)
             
             # Debug information
-            st.sidebar.write(f"Processing {os.path.basename(file)}")
-            
+            logger.debug("Processing %s", os.path.basename(file))
+
             # Check if we need to fix column names
             if len(temp_df.columns) == 2:  # If file has exactly 2 columns
                 temp_df.columns = ['Datetime', 'MW']  # Set standard column names
@@ -66,9 +70,9 @@ def load_data():
         except Exception as e:
             st.sidebar.warning(f"Could not load {file}: {str(e)}")
     
-    # Show how many files were successfully loaded
-    st.sidebar.write(f"Successfully loaded {len(dfs)} files")
-    
+    # Log how many files were successfully loaded
+    logger.debug("Successfully loaded %d files", len(dfs))
+
     # Merge all dataframes on Datetime
     if dfs:
         df = dfs[0]
@@ -106,6 +110,11 @@ def get_selected_region(df):
 # Load the data
 try:
     df = load_data()
+    # Show the load status outside the cached function so it renders on
+    # every run, not just on cache misses
+    st.sidebar.caption(
+        f"Loaded {len([col for col in df.columns if col.endswith('_MW')])} regions"
+    )
     selected_column = get_selected_region(df)
 except FileNotFoundError:
     st.error("Error: No PJM data files found in the 'data' folder.")